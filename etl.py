@@ -1,9 +1,22 @@
+import asyncio
+import gzip
+import hashlib
+import itertools
 import os
 import logging
-import psycopg2
-from psycopg2.extras import execute_batch
+import operator
+import re
+import struct
+import tempfile
+import time
+from typing import Iterable, Iterator
+import aiohttp
+import ijson
+import numpy as np
+import orjson
+import psycopg
 from dotenv import load_dotenv
-import overpass
+from psycopg_pool import ConnectionPool
 
 # Load environment variables from .env file
 load_dotenv()
@@ -23,23 +36,110 @@ db_params = {
     "port": os.getenv("DB_PORT", 5432),
 }
 
-# Overpass API query to fetch roads for a specific area (e.g., Helsinki)
-city_name = os.getenv("CITY_NAME", "Helsinki")
-overpass_query = f"""
+# Connection pool shared by all database steps, initialized in main()
+connection_pool = None
+
+# Overpass API endpoint
+overpass_url = os.getenv("OVERPASS_URL", "https://overpass-api.de/api/interpreter")
+
+# Overpass HTTP client settings. Responses are requested gzip compressed and at
+# most OVERPASS_CONNECTIONS connections are kept open to the API. Failed
+# requests are retried OVERPASS_RETRIES times, waiting OVERPASS_BACKOFF seconds
+# before the first retry and doubling the wait for each further one.
+OVERPASS_HEADERS = {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+OVERPASS_CONNECTIONS = 4
+OVERPASS_RETRIES = 3
+OVERPASS_BACKOFF = 1.0
+# HTTP statuses worth retrying: rate limiting and gateway errors/timeouts
+OVERPASS_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Size of the response body chunks fed to the JSON parser, in bytes
+OVERPASS_CHUNK_SIZE = 64 * 1024
+# Overpass reports runtime errors (timeouts, out of memory) with status 200, a
+# truncated element list and a "remark" member placed last in the top-level
+# object. Only this many trailing body bytes are kept to look for it.
+OVERPASS_REMARK_TAIL_SIZE = 16 * 1024
+# Matches a string "remark" member that closes the top-level object. Inside
+# elements a string value is always followed by more than one closing bracket.
+OVERPASS_REMARK_PATTERN = re.compile(rb'"remark"\s*:\s*("(?:[^"\\]|\\.)*")\s*\}\s*$')
+
+# Overpass API query to fetch roads for a specific area (e.g., Helsinki).
+# `out tags geom` returns ids, tags and geometry but skips node references and
+# metadata that transform_stream() never reads.
+OVERPASS_QUERY_TEMPLATE = """
+[out:json][timeout:180];
 area["name"="{city_name}"]->.a;
 (
   way(area.a)[highway];
 );
-out geom;
+out tags geom;
 """
 
+# The server may take up to the query's [timeout:180] before it sends the first
+# byte, so reads may stall a bit longer than that. There is no total limit,
+# since streaming the body of a large area can take arbitrarily long.
+OVERPASS_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=240)
+
+# Areas to fetch: CITY_NAME names a single area, CITY_NAMES (if set) lists
+# several areas separated by semicolons, fetched concurrently. Semicolons are
+# used because area names may contain commas. Repeated names are fetched once.
+city_name = os.getenv("CITY_NAME", "Helsinki")
+city_names = list(
+    dict.fromkeys(
+        name.strip() for name in os.getenv("CITY_NAMES", "").split(";") if name.strip()
+    )
+) or [city_name]
+overpass_queries = [
+    OVERPASS_QUERY_TEMPLATE.format(city_name=name) for name in city_names
+]
+
+# Tags read by transform_stream(); all other tags are dropped right after fetching
+ROAD_TAGS = ("name", "highway")
+
+# Shared fallback for elements without tags, never mutated
+_EMPTY_TAGS = {}
+
+# Pulls the (lon, lat) pair out of an Overpass geometry point
+_lon_lat = operator.itemgetter("lon", "lat")
+
+# On-disk cache of Overpass responses, keyed by a hash of the query
+cache_dir = os.getenv("OVERPASS_CACHE_DIR", ".cache")
+cache_ttl = int(os.getenv("OVERPASS_CACHE_TTL", 24 * 60 * 60))  # seconds
+
 # SQL Query
-INSERT_ROAD_QUERY = """
-INSERT INTO roads (road_id, road_name, road_type, geom)
-VALUES (%s, %s, %s, ST_GeomFromText(%s, 4326))
+# Rows are bulk loaded into the unlogged, index-free roads_stage table with
+# COPY and then moved into roads in a single INSERT ... SELECT, so primary key
+# maintenance happens once in bulk instead of per COPY row. The hex EWKB
+# geometries are parsed by the geometry column input of the stage. The
+# statements following the COPY are sent in pipeline mode, back to back with a
+# single Sync. Each statement runs once per load, so none is worth preparing.
+
+# The load is idempotent and can simply be replayed after a crash, so its
+# transaction does not need to wait for the WAL flush on commit.
+SET_ASYNC_COMMIT_QUERY = "SET LOCAL synchronous_commit = off"
+
+CREATE_ROADS_STAGE_QUERY = """
+CREATE UNLOGGED TABLE IF NOT EXISTS roads_stage (LIKE roads INCLUDING DEFAULTS)
+"""
+
+COPY_ROADS_STAGE_QUERY = "COPY roads_stage FROM STDIN WITH (FORMAT text)"
+
+INSERT_ROADS_FROM_STAGE_QUERY = """
+INSERT INTO roads
+SELECT DISTINCT ON (road_id) * FROM roads_stage
 ON CONFLICT (road_id) DO NOTHING
 """
 
+TRUNCATE_ROADS_STAGE_QUERY = "TRUNCATE roads_stage"
+
+# Number of elements transform_stream() turns into one page of rows. Pages only
+# bound how much is transformed at once; load() streams all of them through a
+# single COPY.
+LOAD_PAGE_SIZE = 1000
+
+# EWKB header of a little-endian LineString carrying SRID 4326: byte order,
+# geometry type with the SRID flag set, then the SRID itself.
+EWKB_LINESTRING_HEADER = struct.pack("<BII", 1, 0x20000002, 4326)
+
 CREATE_ROADS_TABLE_QUERY = """
 CREATE EXTENSION IF NOT EXISTS postgis;
 CREATE TABLE IF NOT EXISTS roads (
@@ -48,24 +148,23 @@ CREATE TABLE IF NOT EXISTS roads (
     road_type TEXT NOT NULL,
     geom geometry(LineString, 4326) 
 );
+-- load() recreates the stage from the current roads definition
+DROP TABLE IF EXISTS roads_stage;
 """
 
 
-def create_table_if_not_exists() -> None:
+def create_table_if_not_exists(conn) -> None:
     """
     Ensures that the 'roads' table exists in the database by creating it if it does not already exist.
 
-    This function connects to a PostgreSQL database using the provided connection parameters,
-    executes the SQL query defined in `CREATE_ROADS_TABLE_QUERY` to create the 'roads' table,
-    and logs the operation's success or failure.
+    This function executes the SQL query defined in `CREATE_ROADS_TABLE_QUERY` on the given
+    connection to create the 'roads' table, and logs the operation's success or failure.
+    All DDL statements are sent as one simple query message, which the server runs as a
+    single implicit transaction: one round-trip and one commit.
 
     Input:
-        - Relies on the global `db_params` dictionary for database connection parameters:
-            - dbname: Name of the database.
-            - user: Username for authentication.
-            - password: Password for authentication.
-            - host: Host address of the database.
-            - port: Port number for the database connection.
+        - conn (psycopg.Connection): An open connection, typically taken from
+          `connection_pool`.
         - Relies on the global `CREATE_ROADS_TABLE_QUERY` for the SQL query to create the table.
         - Relies on the global `logger` for logging.
 
@@ -74,56 +173,252 @@ def create_table_if_not_exists() -> None:
         - Logs an exception message if a database error occurs.
 
     Raises:
-        - psycopg2.Error: If there is an error during the database operation.
+        - psycopg.Error: If there is an error during the database operation.
     """
     try:
-        conn = psycopg2.connect(
-            dbname=db_params["dbname"],
-            user=db_params["user"],
-            password=db_params["password"],
-            host=db_params["host"],
-            port=db_params["port"],
-        )
-        cur = conn.cursor()
-
-        # Now create the roads table
-        cur.execute(CREATE_ROADS_TABLE_QUERY)
-        conn.commit()
-        cur.close()
-        conn.close()
+        # In autocommit mode no separate BEGIN/COMMIT is sent; the statements of
+        # the query are still applied atomically
+        conn.autocommit = True
+        try:
+            conn.execute(CREATE_ROADS_TABLE_QUERY)
+        finally:
+            conn.autocommit = False
         logger.info("Ensured 'roads' table exists in the database.")
-    except psycopg2.Error as e:
+    except psycopg.Error as e:
         logger.exception(f"Database error during table creation: {e}")
 
 
-def extract() -> dict:
+def _cache_path(query: str) -> str:
+    """
+    Returns the gzip cache file path for an Overpass query.
+    """
+    digest = hashlib.blake2b(query.encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, f"overpass_{digest}.jsonl.gz")
+
+
+def _compact(element: dict) -> dict:
     """
-    Fetches data from the Overpass API using a predefined query.
+    Strips an Overpass element down to the fields used by transform_stream().
 
-    This function uses the Overpass API to execute a query and retrieve data
-    in JSON format. If an error occurs during the API call, it logs the exception
-    and returns an empty dictionary.
+    Only the id, the `ROAD_TAGS` tags and the geometry are kept, which keeps
+    the cache small and quick to reload.
+    """
+    tags = element.get("tags", {})
+    return {
+        "id": element.get("id"),
+        "tags": {key: tags[key] for key in ROAD_TAGS if key in tags},
+        "geometry": element.get("geometry"),
+    }
 
-    Returns:
-        dict: The response data from the Overpass API in JSON format if successful,
-              otherwise an empty dictionary.
+
+async def _fetch_to_cache(session: aiohttp.ClientSession, query: str) -> None:
+    """
+    Streams the response of one Overpass query into its cache file.
+
+    Nothing is fetched if a cache file younger than `cache_ttl` seconds exists.
+    Otherwise the query is posted to `overpass_url`, the response body is parsed
+    incrementally with ijson and each compacted element is appended to the cache
+    as a gzip compressed JSON line, so only the elements of one body chunk are
+    held in memory at a time no matter how large the area is. The cache file is
+    only replaced once the response has been read completely and carries no
+    error remark from the server. Network errors, timeouts, truncated responses
+    and retryable HTTP statuses are retried with exponential backoff. If the API
+    call still fails, or the cache cannot be written, it logs the exception and
+    leaves the previous cache file untouched.
     """
-    api = overpass.API()
+    path = _cache_path(query)
+    try:
+        if time.time() - os.path.getmtime(path) < cache_ttl:
+            logger.info(f"Using cached Overpass data {path}.")
+            return
+    except OSError:
+        pass  # no cache entry yet
+
+    tmp_path = None
     try:
-        response = api.get(overpass_query, responseformat="json")
+        os.makedirs(cache_dir, exist_ok=True)
+        # A unique temporary file per fetch, so concurrent fetches never write
+        # to or rename each other's files
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=cache_dir
+        )
+        os.close(fd)
+        for attempt in range(OVERPASS_RETRIES + 1):
+            try:
+                elements = ijson.sendable_list()
+                parser = ijson.items_coro(elements, "elements.item", use_float=True)
+                tail = b""
+                async with session.post(overpass_url, data={"data": query}) as resp:
+                    resp.raise_for_status()
+                    with gzip.open(tmp_path, "wb", compresslevel=6) as cache:
+                        async for chunk in resp.content.iter_chunked(OVERPASS_CHUNK_SIZE):
+                            parser.send(chunk)
+                            tail = (tail + chunk)[-OVERPASS_REMARK_TAIL_SIZE:]
+                            for element in elements:
+                                cache.write(orjson.dumps(_compact(element)) + b"\n")
+                            del elements[:]
+                        parser.close()
+                        for element in elements:
+                            cache.write(orjson.dumps(_compact(element)) + b"\n")
+                # The parser has validated the whole body, so the remark can be
+                # read from its tail without tokenizing the geometry twice
+                remark = OVERPASS_REMARK_PATTERN.search(tail)
+                if remark:
+                    logger.error(
+                        f"Overpass API reported an error: {orjson.loads(remark.group(1))}"
+                    )
+                    return
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError, ijson.JSONError) as e:
+                retryable = (
+                    not isinstance(e, aiohttp.ClientResponseError)
+                    or e.status in OVERPASS_RETRY_STATUSES
+                )
+                reason = str(e) or type(e).__name__  # timeouts have no message
+                if not retryable or attempt == OVERPASS_RETRIES:
+                    logger.exception(f"Error fetching data from Overpass API: {reason}")
+                    return
+                delay = OVERPASS_BACKOFF * 2**attempt
+                logger.warning(
+                    f"Error fetching data from Overpass API: {reason}; retrying in {delay}s."
+                )
+                await asyncio.sleep(delay)
+        os.replace(tmp_path, path)
+        tmp_path = None
         logger.info("Successfully fetched data using Overpass API.")
-        return response
-    except Exception as e:
-        logger.exception(f"Error fetching data from Overpass API: {e}")
-        return {}
+    except OSError as e:
+        # Disk full, read-only cache directory etc. only fail this area
+        logger.exception(f"Could not write Overpass cache {path}: {e}")
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+async def extract_async(queries: list) -> None:
+    """
+    Fetches the given Overpass queries concurrently into the on-disk cache.
+
+    All queries share one aiohttp session, so its connector keeps up to
+    `OVERPASS_CONNECTIONS` connections to the Overpass API alive between
+    requests and retries, and every request asks for a gzip compressed body.
+    Connects and reads are bounded by `OVERPASS_TIMEOUT`.
+
+    Args:
+        queries (list[str]): Overpass QL queries to fetch.
+    """
+    connector = aiohttp.TCPConnector(limit=OVERPASS_CONNECTIONS)
+    async with aiohttp.ClientSession(
+        connector=connector, headers=OVERPASS_HEADERS, timeout=OVERPASS_TIMEOUT
+    ) as session:
+        await asyncio.gather(*(_fetch_to_cache(session, query) for query in queries))
 
 
-def transform(data: dict) -> list:
+def extract_stream(queries: list) -> Iterator[dict]:
     """
-    Transforms raw road data into a structured format.
+    Streams the cached road elements of the given Overpass queries.
+
+    extract_async() must have been run for the same queries first. Queries
+    without a cache file (e.g. because fetching them failed) are skipped with
+    a warning.
+
+    Args:
+        queries (list[str]): Overpass QL queries whose results should be read.
+
+    Yields:
+        dict: A compacted Overpass element with "id", "tags" and "geometry" keys.
+    """
+    for query in queries:
+        path = _cache_path(query)
+        try:
+            with gzip.open(path, "rb") as f:
+                for line in f:
+                    yield orjson.loads(line)
+        except FileNotFoundError:
+            logger.warning(f"No Overpass data available for cache {path}.")
+
+
+def _ewkb_linestrings(counts: np.ndarray, coords: np.ndarray) -> list:
+    """
+    Builds hex encoded EWKB LineStrings for a batch of geometries at once.
+
+    The point counts and the coordinates of the whole batch are each hex
+    encoded with a single call, so building one geometry only takes string
+    slicing and concatenation.
+
+    Args:
+        counts (np.ndarray): Number of points of each LineString.
+        coords (np.ndarray): Little-endian float64 array of all lon/lat pairs,
+            geometry after geometry.
+
+    Returns:
+        list[str]: One hex encoded EWKB LineString per entry in `counts`.
+    """
+    header_hex = EWKB_LINESTRING_HEADER.hex()
+    counts_hex = counts.astype("<u4").tobytes().hex()
+    coords_hex = coords.tobytes().hex()
+    ends = (32 * np.cumsum(counts)).tolist()  # 16 bytes per point
+    starts = [0] + ends[:-1]
+    return [
+        header_hex + counts_hex[8 * i : 8 * i + 8] + coords_hex[start:end]
+        for i, (start, end) in enumerate(zip(starts, ends))
+    ]
+
+
+def _transform_page(page: list) -> dict:
+    """
+    Transforms one page of raw road elements, see transform_stream().
+    """
+    chain = itertools.chain.from_iterable
+
+    ids = []
+    names = []
+    types = []
+    geometries = []
+    geometry_positions = []
+    # Bind the per-element methods once per page instead of looking them
+    # up on every iteration
+    add_id, add_name, add_type = ids.append, names.append, types.append
+    add_geometry, add_position = geometries.append, geometry_positions.append
+    for position, element in enumerate(page):
+        get = element.get
+        road_id = str(get("id"))
+        tags = get("tags") or _EMPTY_TAGS
+        add_id(road_id)
+        add_name(tags.get("name", f"road_{road_id}"))  # fallback if no name
+        add_type(tags.get("highway", "unknown"))
+
+        geometry = get("geometry")
+        if geometry:
+            add_geometry(geometry)
+            add_position(position)
+
+    # Build the EWKB LineStrings of the whole page in one vectorized pass;
+    # coordinates are copied straight into a little-endian float64 array
+    # whose raw bytes are the WKB points, so neither side has to format or
+    # parse decimal strings.
+    geoms = [None] * len(page)
+    if geometries:
+        counts = np.fromiter(
+            map(len, geometries), dtype=np.int64, count=len(geometries)
+        )
+        coords = np.fromiter(
+            chain(map(_lon_lat, chain(geometries))),
+            dtype="<f8",
+            count=2 * int(counts.sum()),
+        )
+        linestrings = _ewkb_linestrings(counts, coords)
+        for position, linestring_ewkb in zip(geometry_positions, linestrings):
+            geoms[position] = linestring_ewkb
+
+    return {"ids": ids, "names": names, "types": types, "geoms": geoms}
+
+
+def transform_stream(elements: Iterable[dict]) -> Iterator[dict]:
+    """
+    Transforms raw road elements into a structured format, one page of
+    `LOAD_PAGE_SIZE` elements at a time.
     Args:
-        data (dict): A dictionary containing road data. Expected to have a key "elements",
-                     which is a list of dictionaries. Each dictionary represents a road element
+        elements (Iterable[dict]): An iterable of dictionaries, each representing a road element
                      with the following structure:
                      - "id" (int or str): The unique identifier of the road.
                      - "tags" (dict): A dictionary of metadata about the road, including:
@@ -133,106 +428,125 @@ def transform(data: dict) -> list:
                                          where each dictionary contains:
                                          - "lon" (float): Longitude of a point.
                                          - "lat" (float): Latitude of a point.
-    Returns:
-        list: A list of tuples, where each tuple represents a transformed road with the following structure:
-              - road_id (str): The unique identifier of the road as a string.
-              - road_name (str): The name of the road, or a fallback name if not provided.
-              - road_type (str): The type of road, or "unknown" if not provided.
-              - linestring_wkt (str or None): The geometry of the road in WKT LineString format,
-                                              or None if geometry is not provided.
+    Yields:
+        dict: A page of transformed roads as four parallel lists:
+              - "ids" (list[str]): The unique identifiers of the roads as strings.
+              - "names" (list[str]): The names of the roads, or a fallback name if not provided.
+              - "types" (list[str]): The types of the roads, or "unknown" if not provided.
+              - "geoms" (list[str or None]): The geometries of the roads as hex encoded EWKB
+                                             LineStrings (SRID 4326), or None if geometry
+                                             is not provided.
     Logs:
-        Logs the number of roads transformed using the logger.
+        Logs the number of roads transformed using the logger once the input is exhausted.
     Example:
         Input:
-        {
-            "elements": [
-                {
-                    "id": 1,
-                    "tags": {"name": "Main Street", "highway": "residential"},
-                    "geometry": [{"lon": 10.0, "lat": 20.0}, {"lon": 11.0, "lat": 21.0}]
-                }
-            ]
-        }
-        Output:
         [
-            ("1", "Main Street", "residential", "LINESTRING(10.0 20.0, 11.0 21.0)")
+            {
+                "id": 1,
+                "tags": {"name": "Main Street", "highway": "residential"},
+                "geometry": [{"lon": 10.0, "lat": 20.0}, {"lon": 11.0, "lat": 21.0}]
+            }
         ]
+        Output:
+        {
+            "ids": ["1"],
+            "names": ["Main Street"],
+            "types": ["residential"],
+            "geoms": [
+                "0102000020e6100000020000000000000000002440000000000000344000000000000026400000000000003540"
+            ],
+        }
     """
-    elements = data.get("elements", [])
-    transformed_data = []
+    count = 0
+    elements = iter(elements)
+    pages = iter(lambda: list(itertools.islice(elements, LOAD_PAGE_SIZE)), [])
 
-    for element in elements:
-        road_id = str(element.get("id"))
-        tags = element.get("tags", {})
-        road_name = tags.get("name", f"road_{road_id}")  # fallback if no name
-        road_type = tags.get("highway", "unknown")
-        
-        geometry = element.get("geometry")
-        if geometry:
-            # Build WKT LineString
-            coords = ", ".join(f"{point['lon']} {point['lat']}" for point in geometry)
-            linestring_wkt = f"LINESTRING({coords})"
-        else:
-            linestring_wkt = None
-
-        transformed_data.append((road_id, road_name, road_type, linestring_wkt))
+    # Pages are transformed in this process: the work per page is vectorized,
+    # and pickling raw pages to worker processes costs several times more than
+    # transforming them
+    for transformed_page in map(_transform_page, pages):
+        yield transformed_page
+        count += len(transformed_page["ids"])
 
-    logger.info(f"Transformed {len(transformed_data)} roads.")
-    return transformed_data
+    logger.info(f"Transformed {count} roads.")
 
 
-def load(transformed_data: list) -> None:
+def load(conn, transformed_data: Iterable[dict]) -> int:
     """
     Loads transformed data into the database.
 
-    This function establishes a connection to the database using the provided
-    connection parameters, executes a batch insert query to load the transformed
-    data, and commits the transaction. If an error occurs during the process,
-    it logs the error.
+    This function uses the given connection to turn off synchronous commit for
+    its transaction, create the `roads_stage` table if needed, stream the
+    transformed data into it with a single COPY, move it into `roads` with a
+    single INSERT ... SELECT that drops duplicate ids, empty the stage and
+    commit the transaction. The statements before and after the COPY are sent
+    in pipeline mode, so each group costs a single round-trip. Pages are pulled
+    from `transformed_data` one at a time and psycopg streams the COPY data out
+    in bounded chunks, so it can be a lazy stream. If an error occurs during
+    the process, it logs the error.
 
     Args:
-        transformed_data (list[tuple]): A list of tuples containing the transformed
-            data to be inserted into the database.
+        conn (psycopg.Connection): An open connection, typically taken from
+            `connection_pool`.
+        transformed_data (Iterable[dict]): An iterable of pages, as yielded by
+            transform_stream(), each holding the parallel "ids", "names",
+            "types" and "geoms" lists to be inserted into the database.
 
     Returns:
-        None
+        int: The number of rows sent to the database.
 
     Raises:
-        psycopg2.Error: If there is an error during the database operation.
+        psycopg.Error: If there is an error during the database operation.
 
     Logs:
         - Info: Logs a success message when data is loaded successfully.
         - Error: Logs an error message if a database error occurs.
     """
+    count = 0
     try:
-        conn = psycopg2.connect(
-            dbname=db_params["dbname"],
-            user=db_params["user"],
-            password=db_params["password"],
-            host=db_params["host"],
-            port=db_params["port"],
-        )
-        cur = conn.cursor()
-        execute_batch(cur, INSERT_ROAD_QUERY, transformed_data)
-        conn.commit()
-        cur.close()
-        conn.close()
+        # The transaction context commits on success and rolls back on error
+        with conn.transaction(), conn.cursor() as cur:
+            with conn.pipeline():
+                cur.execute(SET_ASYNC_COMMIT_QUERY)
+                cur.execute(CREATE_ROADS_STAGE_QUERY)
+
+            with cur.copy(COPY_ROADS_STAGE_QUERY) as copy:
+                for page in transformed_data:
+                    rows = zip(page["ids"], page["names"], page["types"], page["geoms"])
+                    for row in rows:
+                        copy.write_row(row)
+                    count += len(page["ids"])
+
+            # COPY cannot run in pipeline mode, the statements after it can
+            with conn.pipeline():
+                cur.execute(INSERT_ROADS_FROM_STAGE_QUERY)
+                cur.execute(TRUNCATE_ROADS_STAGE_QUERY)
         logger.info("Data loaded successfully into the database.")
-    except psycopg2.Error as e:
+    except psycopg.Error as e:
         logger.error(f"Database error: {e}")
+    return count
 
 
 def main():
-    # First ensure the table exists
-    create_table_if_not_exists()
-
-    raw_data = extract()
-    if raw_data:
-        main_roads = transform(raw_data)
-        if main_roads:
-            load(main_roads)
-    else:
-        logger.warning("No data to process.")
+    # Fetch every area into the cache concurrently before touching the
+    # database, so no connection sits idle through the network I/O
+    asyncio.run(extract_async(overpass_queries))
+
+    global connection_pool
+    connection_pool = ConnectionPool(
+        kwargs=db_params, min_size=1, max_size=4, open=True
+    )
+    try:
+        # A single pooled connection serves both table creation and loading
+        with connection_pool.connection() as conn:
+            # First ensure the table exists
+            create_table_if_not_exists(conn)
+
+            # Stream the cached elements through transform into COPY page by page
+            if not load(conn, transform_stream(extract_stream(overpass_queries))):
+                logger.warning("No data to process.")
+    finally:
+        connection_pool.close()
 
 
 if __name__ == "__main__":